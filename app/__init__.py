@@ -11,6 +11,7 @@ load_dotenv()
 from .core.config import settings
 from .core.logging_config import get_logger
 from .core.error_handling import register_exception_handlers
+from .services.uploads import ensure_upload_dirs
 
 # Initialize main application logger
 logger = get_logger(__name__)
@@ -23,6 +24,12 @@ app = FastAPI(
     # Add other FastAPI parameters if needed, e.g., lifespan context managers for DB connections
 )
 
+# Flag N+1 queries during development; opt in via NPLUSONE_ENABLED
+if settings.NPLUSONE_ENABLED:
+    from .core.n_plus_one import NPlusOneMiddleware
+    app.add_middleware(NPlusOneMiddleware, raise_errors=settings.NPLUSONE_RAISE)
+    logger.info("N+1 query detection enabled.")
+
 # Mount static files directory
 static_dir = os.path.join(os.path.dirname(__file__), 'static')
 if os.path.exists(static_dir) and os.path.isdir(static_dir):
@@ -65,6 +72,7 @@ async def read_root():
 @app.on_event("startup")
 async def startup_event():
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION} ({settings.APP_ENV})")
+    ensure_upload_dirs()
     # Add any startup tasks here (database connections, etc.)
 
 @app.on_event("shutdown")
@@ -7,6 +7,8 @@ class Settings(BaseSettings):
     APP_VERSION: str = "1.0.0"  # Semantic versioning
     APP_ENV: str = os.getenv("APP_ENV", "development")
     DEBUG: bool = False
+    NPLUSONE_ENABLED: bool = False  # Opt-in N+1 query detection for dev/CI; never in production
+    NPLUSONE_RAISE: bool = False  # Fail requests on N+1 detection (CI)
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,62 @@
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Lazy loads per relationship for the current request; None outside a profiled request
+_lazy_loads: ContextVar[Optional[Counter]] = ContextVar("lazy_loads", default=None)
+_raise_errors: ContextVar[bool] = ContextVar("raise_n_plus_one", default=False)
+
+class NPlusOneError(Exception):
+    """Raised when a relationship is lazy-loaded repeatedly within one request."""
+    pass
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_lazy_load(orm_execute_state):
+    counts = _lazy_loads.get()
+    if counts is None or orm_execute_state.lazy_loaded_from is None:
+        return
+
+    relationship = str(orm_execute_state.loader_strategy_path.path[-1])
+    counts[relationship] += 1
+    if counts[relationship] == 2 and _raise_errors.get():
+        raise NPlusOneError(f"Potential N+1 query detected on `{relationship}`")
+
+class NPlusOneMiddleware:
+    """ASGI middleware that reports relationships lazy-loaded more than once per request.
+
+    Development-only: detections are logged when the request finishes, or raised
+    as NPlusOneError at the offending load when ``raise_errors`` is set (used in
+    CI so tests fail on new offenders).
+    """
+
+    def __init__(self, app, raise_errors: bool = False):
+        self.app = app
+        self.raise_errors = raise_errors
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counts = Counter()
+        counts_token = _lazy_loads.set(counts)
+        raise_token = _raise_errors.set(self.raise_errors)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _lazy_loads.reset(counts_token)
+            _raise_errors.reset(raise_token)
+
+        for relationship, count in counts.items():
+            if count > 1:
+                logger.warning(
+                    f"Potential N+1 query detected on `{relationship}`: "
+                    f"{count} lazy loads in {scope['method']} {scope['path']}"
+                )
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, ForeignKey, Table, DateTime, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, Text, ForeignKey, Table, DateTime, Boolean, Index, event, text, inspect, delete, select, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 from datetime import datetime
@@ -6,8 +6,28 @@ import os
 
 # Create SQLite database engine
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./linkedin_clone.db")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False} if IS_SQLITE else {}
+)
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Tune each new SQLite connection: WAL lets readers run alongside the writer."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+# Keep attributes loaded after commit; every column default is Python-side, so
+# freshly inserted rows already hold their final values
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 Base = declarative_base()
 
@@ -16,12 +36,17 @@ connections = Table(
     'connections',
     Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
-    Column('connection_id', Integer, ForeignKey('users.id'), primary_key=True)
+    Column('connection_id', Integer, ForeignKey('users.id'), primary_key=True),
+    # The primary key only serves lookups by user_id; this covers the reverse side
+    Index('ix_conn_reverse', 'connection_id', 'user_id')
 )
 
 # Connection request table
 class ConnectionRequest(Base):
     __tablename__ = "connection_requests"
+    __table_args__ = (
+        Index("ix_conn_req_recv_status", "receiver_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     sender_id = Column(Integer, ForeignKey("users.id"))
@@ -65,6 +90,9 @@ class User(Base):
         backref="connected_to"
     )
 
+# User columns needed to render a name card (post authors, peers, requesters)
+USER_SUMMARY_COLUMNS = (User.id, User.full_name, User.profile_image, User.headline)
+
 # Experience model
 class Experience(Base):
     __tablename__ = "experiences"
@@ -100,6 +128,10 @@ class Education(Base):
 # Post model
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        # Serves the feed's keyset pagination on (created_at, id) per author
+        Index("ix_post_author_time", "author_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     author_id = Column(Integer, ForeignKey("users.id"))
@@ -114,6 +146,9 @@ class Post(Base):
 # Comment model
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comment_post_time", "post_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(Integer, ForeignKey("posts.id"))
@@ -127,6 +162,9 @@ class Comment(Base):
 # Like model
 class Like(Base):
     __tablename__ = "likes"
+    __table_args__ = (
+        Index("ix_like_post_user", "post_id", "user_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(Integer, ForeignKey("posts.id"))
@@ -139,6 +177,10 @@ class Like(Base):
 # Message model
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_msg_conv", "sender_id", "receiver_id", "created_at"),
+        Index("ix_msg_unread", "receiver_id", "read", "sender_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     sender_id = Column(Integer, ForeignKey("users.id"))
@@ -150,9 +192,51 @@ class Message(Base):
     sender = relationship("User", foreign_keys=[sender_id], back_populates="sent_messages")
     receiver = relationship("User", foreign_keys=[receiver_id], back_populates="received_messages")
 
+# Full-text index over user search fields, kept in sync with users by triggers
+USERS_FTS_DDL = [
+    """CREATE VIRTUAL TABLE users_fts USING fts5(
+        full_name, headline, username, content='users', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(rowid, full_name, headline, username)
+        VALUES (new.id, new.full_name, new.headline, new.username);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, full_name, headline, username)
+        VALUES ('delete', old.id, old.full_name, old.headline, old.username);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF full_name, headline, username ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, full_name, headline, username)
+        VALUES ('delete', old.id, old.full_name, old.headline, old.username);
+        INSERT INTO users_fts(rowid, full_name, headline, username)
+        VALUES (new.id, new.full_name, new.headline, new.username);
+    END""",
+    # Index any users that existed before the FTS table was created
+    "INSERT INTO users_fts(users_fts) VALUES ('rebuild')",
+]
+
 # Create all tables
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # create_all skips tables that already exist, so add any missing indexes
+        like_indexes = {index["name"] for index in inspect(conn).get_indexes("likes")}
+        if "ix_like_post_user" not in like_indexes:
+            # Drop duplicate likes so the unique index can be built
+            conn.execute(delete(Like.__table__).where(Like.id.not_in(
+                select(func.min(Like.id)).group_by(Like.post_id, Like.user_id)
+            )))
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+    if IS_SQLITE:
+        with engine.begin() as conn:
+            fts_exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users_fts'"
+            )).first()
+            if not fts_exists:
+                for statement in USERS_FTS_DDL:
+                    conn.execute(text(statement))
 
 # Get database session
 def get_db():
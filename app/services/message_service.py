@@ -1,7 +1,7 @@
-from sqlalchemy.orm import Session
-from app.models.database import Message, User
+from sqlalchemy.orm import Session, load_only
+from app.models.database import Message, User, USER_SUMMARY_COLUMNS
 from typing import List
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, case, func, update
 
 def send_message(db: Session, sender_id: int, receiver_id: int, content: str):
     """Send a message from one user to another."""
@@ -12,7 +12,6 @@ def send_message(db: Session, sender_id: int, receiver_id: int, content: str):
     )
     db.add(message)
     db.commit()
-    db.refresh(message)
     return message
 
 def get_conversation(db: Session, user1_id: int, user2_id: int, limit: int = 50):
@@ -26,17 +25,15 @@ def get_conversation(db: Session, user1_id: int, user2_id: int, limit: int = 50)
 
 def mark_messages_as_read(db: Session, user_id: int, sender_id: int):
     """Mark all messages from sender to user as read."""
-    messages = db.query(Message).filter(
-        Message.sender_id == sender_id,
-        Message.receiver_id == user_id,
-        Message.read == False
-    ).all()
-    
-    for message in messages:
-        message.read = True
-    
+    result = db.execute(
+        update(Message).where(
+            Message.sender_id == sender_id,
+            Message.receiver_id == user_id,
+            Message.read == False
+        ).values(read=True).execution_options(synchronize_session="evaluate")
+    )
     db.commit()
-    return len(messages)
+    return result.rowcount
 
 def get_unread_messages_count(db: Session, user_id: int):
     """Get count of unread messages for a user."""
@@ -47,39 +44,54 @@ def get_unread_messages_count(db: Session, user_id: int):
 
 def get_conversations(db: Session, user_id: int):
     """Get all conversations for a user."""
-    # Get all users this user has exchanged messages with
-    sent_to = db.query(Message.receiver_id).filter(Message.sender_id == user_id).distinct().all()
-    received_from = db.query(Message.sender_id).filter(Message.receiver_id == user_id).distinct().all()
+    # Latest message per peer in a single windowed query
+    peer_id = case(
+        (Message.sender_id == user_id, Message.receiver_id),
+        else_=Message.sender_id
+    ).label("peer_id")
+    ranked = db.query(
+        Message.id.label("message_id"),
+        peer_id,
+        func.row_number().over(
+            partition_by=peer_id,
+            order_by=(Message.created_at.desc(), Message.id.desc())
+        ).label("rn")
+    ).filter(
+        or_(Message.sender_id == user_id, Message.receiver_id == user_id)
+    ).subquery()
     
-    # Combine and remove duplicates
-    user_ids = set([id[0] for id in sent_to] + [id[0] for id in received_from])
+    last_messages = db.query(Message, ranked.c.peer_id).join(
+        ranked, Message.id == ranked.c.message_id
+    ).filter(ranked.c.rn == 1).all()
     
-    # Get user objects
-    users = db.query(User).filter(User.id.in_(user_ids)).all()
+    if not last_messages:
+        return []
+    
+    # Unread counts per sender in one grouped query
+    unread_counts = dict(db.query(Message.sender_id, func.count(Message.id)).filter(
+        Message.receiver_id == user_id,
+        Message.read == False
+    ).group_by(Message.sender_id).all())
+    
+    # Fetch every peer in one query
+    peer_ids = [peer for _, peer in last_messages]
+    users = db.query(User).options(
+        load_only(*USER_SUMMARY_COLUMNS)
+    ).filter(User.id.in_(peer_ids)).all()
+    users_by_id = {user.id: user for user in users}
+    
+    # Sort by last message time
+    last_messages.sort(key=lambda row: row[0].created_at, reverse=True)
     
-    # Get last message and unread count for each conversation
     conversations = []
-    for other_user in users:
-        last_message = db.query(Message).filter(
-            or_(
-                and_(Message.sender_id == user_id, Message.receiver_id == other_user.id),
-                and_(Message.sender_id == other_user.id, Message.receiver_id == user_id)
-            )
-        ).order_by(Message.created_at.desc()).first()
-        
-        unread_count = db.query(Message).filter(
-            Message.sender_id == other_user.id,
-            Message.receiver_id == user_id,
-            Message.read == False
-        ).count()
-        
+    for last_message, peer in last_messages:
+        other_user = users_by_id.get(peer)
+        if other_user is None:
+            continue
         conversations.append({
             "user": other_user,
             "last_message": last_message,
-            "unread_count": unread_count
+            "unread_count": unread_counts.get(peer, 0)
         })
     
-    # Sort by last message time
-    conversations.sort(key=lambda x: x["last_message"].created_at if x["last_message"] else None, reverse=True)
-    
     return conversations
\ No newline at end of file
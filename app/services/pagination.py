@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+# Keyset cursor: the (created_at, id) of the last row on the previous page
+Cursor = Tuple[datetime, int]
+
+def next_cursor(rows: List, limit: int) -> Optional[Cursor]:
+    """Return the cursor for the page after ``rows``, or None if it was the last."""
+    if len(rows) < limit:
+        return None
+    return rows[-1].created_at, rows[-1].id
+
+def encode_cursor(cursor: Optional[Cursor]) -> Optional[str]:
+    """Serialize a cursor into an opaque string for clients."""
+    if cursor is None:
+        return None
+    created_at, row_id = cursor
+    return f"{created_at.isoformat()}_{row_id}"
+
+def decode_cursor(token: Optional[str]) -> Optional[Cursor]:
+    """Parse a cursor string produced by ``encode_cursor``."""
+    if not token:
+        return None
+    created_at, _, row_id = token.rpartition("_")
+    return datetime.fromisoformat(created_at), int(row_id)
@@ -1,25 +1,21 @@
-from sqlalchemy.orm import Session
-from app.models.database import Post, Comment, Like, User
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import select, literal, tuple_, exists, func
+from sqlalchemy.exc import IntegrityError
+from app.models.database import Post, Comment, Like, connections, USER_SUMMARY_COLUMNS
 from typing import List, Optional
-import os
-import shutil
+from app.services.pagination import Cursor, next_cursor
+from app.services.uploads import save_upload, POST_IMAGES
 from fastapi import UploadFile
 from datetime import datetime
 
-def create_post(db: Session, author_id: int, content: str, image: Optional[UploadFile] = None):
+async def create_post(db: Session, author_id: int, content: str, image: Optional[UploadFile] = None):
     """Create a new post."""
     image_url = None
     
     # Handle image upload if provided
     if image:
-        upload_dir = "app/static/post_images"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        file_path = f"{upload_dir}/{author_id}_{datetime.utcnow().timestamp()}_{image.filename}"
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        
-        image_url = f"/static/post_images/{author_id}_{datetime.utcnow().timestamp()}_{image.filename}"
+        timestamp = datetime.utcnow().timestamp()
+        image_url = await save_upload(image, POST_IMAGES, f"{author_id}_{timestamp}")
     
     # Create post
     post = Post(
@@ -29,7 +25,6 @@ def create_post(db: Session, author_id: int, content: str, image: Optional[Uploa
     )
     db.add(post)
     db.commit()
-    db.refresh(post)
     return post
 
 def get_post_by_id(db: Session, post_id: int):
@@ -38,20 +33,84 @@ def get_post_by_id(db: Session, post_id: int):
 
 def get_user_posts(db: Session, user_id: int, skip: int = 0, limit: int = 10):
     """Get posts by a specific user."""
-    return db.query(Post).filter(Post.author_id == user_id).order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
+    return db.query(Post).options(
+        selectinload(Post.author).load_only(*USER_SUMMARY_COLUMNS)
+    ).filter(Post.author_id == user_id).order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
 
-def get_feed_posts(db: Session, user_id: int, skip: int = 0, limit: int = 20):
-    """Get posts for user's feed (own posts + connections' posts)."""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        return []
+def get_user_posts_with_counts(db: Session, user_id: int, skip: int = 0, limit: int = 10):
+    """Get posts by a specific user with likes_count and comments_count set."""
+    # Aggregate only over this author's posts rather than the whole table
+    likes = db.query(Like.post_id, func.count(Like.id).label("count")).join(Post).filter(
+        Post.author_id == user_id
+    ).group_by(Like.post_id).subquery()
+    comments = db.query(Comment.post_id, func.count(Comment.id).label("count")).join(Post).filter(
+        Post.author_id == user_id
+    ).group_by(Comment.post_id).subquery()
     
-    # Get IDs of all connections
-    connection_ids = [conn.id for conn in user.connections]
-    connection_ids.append(user_id)  # Include user's own posts
+    rows = db.query(
+        Post,
+        func.coalesce(likes.c.count, 0),
+        func.coalesce(comments.c.count, 0)
+    ).options(
+        selectinload(Post.author).load_only(*USER_SUMMARY_COLUMNS)
+    ).outerjoin(likes, Post.id == likes.c.post_id).outerjoin(
+        comments, Post.id == comments.c.post_id
+    ).filter(Post.author_id == user_id).order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
     
-    # Get posts from user and connections
-    return db.query(Post).filter(Post.author_id.in_(connection_ids)).order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
+    posts = []
+    for post, likes_count, comments_count in rows:
+        post.likes_count = likes_count
+        post.comments_count = comments_count
+        posts.append(post)
+    return posts
+
+def get_feed_posts(db: Session, user_id: int, cursor: Optional[Cursor] = None, limit: int = 20):
+    """Get posts for user's feed (own posts + connections' posts).
+    
+    Returns a ``(posts, next_cursor)`` tuple. Pass ``next_cursor`` back in to
+    fetch the following page; it is ``None`` once the feed is exhausted.
+    """
+    # IDs of all connections plus the user's own, resolved inside the query
+    author_ids = select(connections.c.connection_id).where(
+        connections.c.user_id == user_id
+    ).union_all(select(literal(user_id)))
+    
+    query = db.query(Post).options(
+        selectinload(Post.author).load_only(*USER_SUMMARY_COLUMNS)
+    ).filter(Post.author_id.in_(author_ids))
+    if cursor:
+        query = query.filter(tuple_(Post.created_at, Post.id) < tuple_(*cursor))
+    
+    posts = query.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit).all()
+    
+    return posts, next_cursor(posts, limit)
+
+def annotate_posts(db: Session, posts: List[Post], viewer_id: int):
+    """Attach likes_count, comments_count and liked_by_viewer to each post.
+    
+    Uses one grouped query per attribute for the whole page rather than
+    querying per post.
+    """
+    post_ids = [post.id for post in posts]
+    if not post_ids:
+        return posts
+    
+    likes = dict(db.query(Like.post_id, func.count(Like.id)).filter(
+        Like.post_id.in_(post_ids)
+    ).group_by(Like.post_id).all())
+    comments = dict(db.query(Comment.post_id, func.count(Comment.id)).filter(
+        Comment.post_id.in_(post_ids)
+    ).group_by(Comment.post_id).all())
+    liked_by_viewer = {row[0] for row in db.query(Like.post_id).filter(
+        Like.post_id.in_(post_ids),
+        Like.user_id == viewer_id
+    )}
+    
+    for post in posts:
+        post.likes_count = likes.get(post.id, 0)
+        post.comments_count = comments.get(post.id, 0)
+        post.liked_by_viewer = post.id in liked_by_viewer
+    return posts
 
 def add_comment(db: Session, post_id: int, author_id: int, content: str):
     """Add a comment to a post."""
@@ -62,19 +121,27 @@ def add_comment(db: Session, post_id: int, author_id: int, content: str):
     )
     db.add(comment)
     db.commit()
-    db.refresh(comment)
     return comment
 
-def get_post_comments(db: Session, post_id: int):
-    """Get all comments for a post."""
-    return db.query(Comment).filter(Comment.post_id == post_id).order_by(Comment.created_at.asc()).all()
+def get_post_comments(db: Session, post_id: int, cursor: Optional[Cursor] = None, limit: int = 50):
+    """Get comments for a post, oldest first.
+    
+    Returns a ``(comments, next_cursor)`` tuple; see ``get_feed_posts``.
+    """
+    query = db.query(Comment).options(
+        selectinload(Comment.author).load_only(*USER_SUMMARY_COLUMNS)
+    ).filter(Comment.post_id == post_id)
+    if cursor:
+        query = query.filter(tuple_(Comment.created_at, Comment.id) > tuple_(*cursor))
+    
+    comments = query.order_by(Comment.created_at.asc(), Comment.id.asc()).limit(limit).all()
+    return comments, next_cursor(comments, limit)
 
 def like_post(db: Session, post_id: int, user_id: int):
     """Like a post."""
-    # Check if already liked
-    existing_like = db.query(Like).filter(Like.post_id == post_id, Like.user_id == user_id).first()
-    if existing_like:
-        return existing_like
+    # Check if already liked; only load the row on the uncommon repeat-like path
+    if has_liked_post(db, post_id, user_id):
+        return db.query(Like).filter(Like.post_id == post_id, Like.user_id == user_id).first()
     
     # Create new like
     like = Like(
@@ -82,8 +149,15 @@ def like_post(db: Session, post_id: int, user_id: int):
         user_id=user_id
     )
     db.add(like)
-    db.commit()
-    db.refresh(like)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent like won the race on ix_like_post_user; return that one
+        db.rollback()
+        existing_like = db.query(Like).filter(Like.post_id == post_id, Like.user_id == user_id).first()
+        if existing_like is None:
+            raise
+        return existing_like
     return like
 
 def unlike_post(db: Session, post_id: int, user_id: int):
@@ -97,8 +171,10 @@ def unlike_post(db: Session, post_id: int, user_id: int):
 
 def has_liked_post(db: Session, post_id: int, user_id: int):
     """Check if a user has liked a post."""
-    return db.query(Like).filter(Like.post_id == post_id, Like.user_id == user_id).first() is not None
+    return db.query(
+        exists().where(Like.post_id == post_id, Like.user_id == user_id)
+    ).scalar()
 
 def get_post_likes_count(db: Session, post_id: int):
     """Get the number of likes for a post."""
-    return db.query(Like).filter(Like.post_id == post_id).count()
\ No newline at end of file
+    return db.query(func.count(Like.id)).filter(Like.post_id == post_id).scalar()
\ No newline at end of file
@@ -0,0 +1,31 @@
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+import os
+import shutil
+
+# Uploads live under app/static and are served from /static
+STATIC_DIR = "app/static"
+POST_IMAGES = "post_images"
+PROFILE_IMAGES = "profile_images"
+
+CHUNK_SIZE = 1 << 20  # 1 MiB
+
+def ensure_upload_dirs():
+    """Create the upload directories.
+    
+    Called once at startup by each entrypoint; scripts that save uploads
+    through the services must call it themselves first.
+    """
+    for subdir in (POST_IMAGES, PROFILE_IMAGES):
+        os.makedirs(f"{STATIC_DIR}/{subdir}", exist_ok=True)
+
+def _copy_upload(file: UploadFile, file_path: str):
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer, CHUNK_SIZE)
+
+async def save_upload(file: UploadFile, subdir: str, prefix: str):
+    """Save an uploaded file off the event loop and return its /static URL."""
+    # Strip any client-supplied directory components from the filename
+    relative_path = f"{subdir}/{prefix}_{os.path.basename(file.filename or 'upload')}"
+    await run_in_threadpool(_copy_upload, file, f"{STATIC_DIR}/{relative_path}")
+    return f"/static/{relative_path}"
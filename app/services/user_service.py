@@ -1,15 +1,19 @@
-from sqlalchemy.orm import Session
-from app.models.database import User, Experience, Education, ConnectionRequest
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select, text, tuple_
+from app.models.database import User, Experience, Education, ConnectionRequest, connections, IS_SQLITE, USER_SUMMARY_COLUMNS
 from app.services.auth import get_password_hash
+from app.services.uploads import save_upload, PROFILE_IMAGES
+from app.services.pagination import Cursor, next_cursor
 from typing import List, Optional
 from datetime import datetime
-import os
-import shutil
+from concurrent.futures import ProcessPoolExecutor
 from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
 
-def create_user(db: Session, email: str, username: str, password: str, full_name: str):
+async def create_user(db: Session, email: str, username: str, password: str, full_name: str):
     """Create a new user."""
-    hashed_password = get_password_hash(password)
+    # Hashing is deliberately slow; keep it off the event loop
+    hashed_password = await run_in_threadpool(get_password_hash, password)
     db_user = User(
         email=email,
         username=username,
@@ -18,20 +22,58 @@ def create_user(db: Session, email: str, username: str, password: str, full_name
     )
     db.add(db_user)
     db.commit()
-    db.refresh(db_user)
     return db_user
 
+def import_users(db: Session, users: List[dict], max_workers: Optional[int] = None):
+    """Bulk-create users for seed and import scripts.
+    
+    Each dict needs email, username, password and full_name. Passwords are
+    hashed in parallel across processes, then all rows go in as one
+    batched INSERT. Returns the number of users created.
+    """
+    if not users:
+        return 0
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        hashed_passwords = list(executor.map(get_password_hash, [user["password"] for user in users]))
+    
+    db.execute(User.__table__.insert(), [
+        {
+            "email": user["email"],
+            "username": user["username"],
+            "hashed_password": hashed_password,
+            "full_name": user["full_name"]
+        }
+        for user, hashed_password in zip(users, hashed_passwords)
+    ])
+    db.commit()
+    return len(users)
+
 def get_user_by_username(db: Session, username: str):
-    """Get a user by username."""
-    return db.query(User).filter(User.username == username).first()
+    """Get a user by username.
+    
+    Resolved usernames are memoized on the session, so repeat lookups within
+    a request are served from the identity map.
+    """
+    user_ids = db.info.setdefault("user_ids_by_username", {})
+    user_id = user_ids.get(username)
+    if user_id is not None:
+        user = db.get(User, user_id)
+        if user is not None and user.username == username:
+            return user
+    
+    user = db.query(User).filter(User.username == username).first()
+    if user is not None:
+        user_ids[username] = user.id
+    return user
 
 def get_user_by_email(db: Session, email: str):
     """Get a user by email."""
     return db.query(User).filter(User.email == email).first()
 
 def get_user_by_id(db: Session, user_id: int):
-    """Get a user by ID."""
-    return db.query(User).filter(User.id == user_id).first()
+    """Get a user by ID, without a query if the session already holds it."""
+    return db.get(User, user_id)
 
 def update_profile(db: Session, user_id: int, **kwargs):
     """Update user profile."""
@@ -47,24 +89,14 @@ def update_profile(db: Session, user_id: int, **kwargs):
     db.refresh(user)
     return user
 
-def update_profile_image(db: Session, user_id: int, file: UploadFile):
+async def update_profile_image(db: Session, user_id: int, file: UploadFile):
     """Update user profile image."""
     user = get_user_by_id(db, user_id)
     if not user:
         return None
     
-    # Create directory if it doesn't exist
-    upload_dir = "app/static/profile_images"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Save file
-    file_path = f"{upload_dir}/{user_id}_{file.filename}"
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    # Update user profile image path
-    relative_path = f"/static/profile_images/{user_id}_{file.filename}"
-    user.profile_image = relative_path
+    # Save file and update user profile image path
+    user.profile_image = await save_upload(file, PROFILE_IMAGES, str(user_id))
     db.commit()
     db.refresh(user)
     return user
@@ -86,7 +118,6 @@ def add_experience(db: Session, user_id: int, title: str, company: str,
     )
     db.add(experience)
     db.commit()
-    db.refresh(experience)
     return experience
 
 def add_education(db: Session, user_id: int, school: str, degree: str, 
@@ -106,7 +137,6 @@ def add_education(db: Session, user_id: int, school: str, degree: str,
     )
     db.add(education)
     db.commit()
-    db.refresh(education)
     return education
 
 def get_user_connections(db: Session, user_id: int):
@@ -116,6 +146,15 @@ def get_user_connections(db: Session, user_id: int):
         return []
     return user.connections
 
+def are_connected(db: Session, user_id: int, connection_id: int):
+    """Check if user_id has connection_id among their connections."""
+    return db.execute(
+        select(1).select_from(connections).where(
+            connections.c.user_id == user_id,
+            connections.c.connection_id == connection_id
+        ).limit(1)
+    ).first() is not None
+
 def send_connection_request(db: Session, sender_id: int, receiver_id: int):
     """Send a connection request."""
     # Check if request already exists
@@ -129,8 +168,7 @@ def send_connection_request(db: Session, sender_id: int, receiver_id: int):
         return existing_request
     
     # Check if users are already connected
-    sender = get_user_by_id(db, sender_id)
-    if any(conn.id == receiver_id for conn in sender.connections):
+    if are_connected(db, sender_id, receiver_id):
         return None
     
     # Create new request
@@ -140,7 +178,6 @@ def send_connection_request(db: Session, sender_id: int, receiver_id: int):
     )
     db.add(request)
     db.commit()
-    db.refresh(request)
     return request
 
 def accept_connection_request(db: Session, request_id: int):
@@ -152,11 +189,17 @@ def accept_connection_request(db: Session, request_id: int):
     # Update request status
     request.status = "accepted"
     
-    # Add connection to both users
-    sender = get_user_by_id(db, request.sender_id)
-    receiver = get_user_by_id(db, request.receiver_id)
+    # Add connection to both users in one statement
+    db.execute(connections.insert().prefix_with("OR IGNORE", dialect="sqlite").values([
+        {"user_id": request.sender_id, "connection_id": request.receiver_id},
+        {"user_id": request.receiver_id, "connection_id": request.sender_id}
+    ]))
     
-    sender.connections.append(receiver)
+    # Sessions keep state across commits, so drop any connection lists already loaded
+    for user_id in (request.sender_id, request.receiver_id):
+        user = db.identity_map.get(db.identity_key(User, user_id))
+        if user is not None:
+            db.expire(user, ["connections", "connected_to"])
     
     db.commit()
     return request
@@ -171,17 +214,49 @@ def reject_connection_request(db: Session, request_id: int):
     db.commit()
     return request
 
-def get_pending_requests(db: Session, user_id: int):
-    """Get pending connection requests for a user."""
-    return db.query(ConnectionRequest).filter(
+def get_pending_requests(db: Session, user_id: int, cursor: Optional[Cursor] = None, limit: int = 50):
+    """Get pending connection requests for a user, newest first.
+    
+    Returns a ``(requests, next_cursor)`` tuple. Pass ``next_cursor`` back in
+    to fetch the following page; it is ``None`` once there are no more.
+    """
+    query = db.query(ConnectionRequest).options(
+        joinedload(ConnectionRequest.sender).load_only(*USER_SUMMARY_COLUMNS)
+    ).filter(
         ConnectionRequest.receiver_id == user_id,
         ConnectionRequest.status == "pending"
-    ).all()
+    )
+    if cursor:
+        query = query.filter(tuple_(ConnectionRequest.created_at, ConnectionRequest.id) < tuple_(*cursor))
+    
+    requests = query.order_by(
+        ConnectionRequest.created_at.desc(), ConnectionRequest.id.desc()
+    ).limit(limit).all()
+    return requests, next_cursor(requests, limit)
 
 def search_users(db: Session, query: str, limit: int = 10):
-    """Search for users by name or headline."""
-    return db.query(User).filter(
-        (User.full_name.ilike(f"%{query}%")) | 
-        (User.headline.ilike(f"%{query}%")) |
-        (User.username.ilike(f"%{query}%"))
-    ).limit(limit).all()
\ No newline at end of file
+    """Search for users by name, headline or username."""
+    if not IS_SQLITE:
+        return db.query(User).filter(
+            (User.full_name.ilike(f"%{query}%")) | 
+            (User.headline.ilike(f"%{query}%")) |
+            (User.username.ilike(f"%{query}%"))
+        ).limit(limit).all()
+    
+    # Quote each term so user input can't inject FTS5 syntax, and prefix-match it
+    terms = [term.replace('"', '""') for term in query.split()]
+    if not terms:
+        return []
+    match = " ".join(f'"{term}"*' for term in terms)
+    
+    rows = db.execute(
+        text("SELECT rowid FROM users_fts WHERE users_fts MATCH :match ORDER BY rank LIMIT :limit"),
+        {"match": match, "limit": limit}
+    ).all()
+    user_ids = [row[0] for row in rows]
+    if not user_ids:
+        return []
+    
+    # Preserve FTS rank order
+    users = {user.id: user for user in db.query(User).filter(User.id.in_(user_ids)).all()}
+    return [users[user_id] for user_id in user_ids if user_id in users]
\ No newline at end of file
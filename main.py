@@ -26,6 +26,8 @@ if FRAMEWORK == "nicegui":
     try:
         # Import the enhanced NiceGUI implementation
         from app.frontend.nicegui_app import ui, app as nicegui_app
+        from app.services.uploads import ensure_upload_dirs
+        ensure_upload_dirs()
         logger.info("NiceGUI framework initialized successfully")
         application = nicegui_app
         